@@ -1,6 +1,14 @@
 import os
 import json
 import hashlib
+import functools
+import sqlite3
+import shutil
+import tempfile
+import threading
+import queue
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 import streamlit as st
 import pymupdf
@@ -8,13 +16,39 @@ from deep_translator import (
     GoogleTranslator,
 )
 from deep_translator.openai_compatible import OpenAICompatibleTranslator
+from pdf_common import (
+    COLOR_MAP,
+    CSS_COLOR_MAP,
+    FAST_SAVE_OPTIONS,
+    FINAL_SAVE_OPTIONS,
+    WHITE,
+    should_translate,
+)
 import logging
 import argparse
 
+# Application log; basicConfig does nothing once handlers exist, so reruns do not add more
+logging.basicConfig(filename='application.log', level=logging.INFO, format='%(asctime)s - %(levelname)-5s %(lineno)d %(filename)s:%(funcName)s - %(message)s')
+
+# Previews don't need ICC color management, and MuPDF repair warnings for malformed
+# PDFs would only flood the console
+pymupdf.TOOLS.set_icc(False)
+pymupdf.TOOLS.mupdf_display_errors(False)
+
 # Constants
 DEFAULT_PAGES_PER_LOAD = 2
 DEFAULT_MODEL = "default_model"
 DEFAULT_API_BASE = "http://localhost:8080/v1"
+MAX_TRANSLATION_WORKERS = 8
+TRANSLATION_WORKERS_LIMIT = 32  # largest value of the "Translation workers" slider
+MAX_PAGE_WORKERS = 4  # pages translated at the same time
+PREFETCH_PROGRESS = 0.9  # share of the Translate All progress bar for translating the texts
+TM_COMMIT_BATCH = 50
+VIEW_CACHE_SIZE = 16  # translated page windows kept per session
+CACHE_KEY_VERSION = "v7"  # bump to invalidate existing page caches
+PAGE_CACHE_ENTRIES = 256  # parsed page cache entries kept in memory
+CACHE_VERIFY = False  # check cached pages against the page text (--verify-cache)
+FAST_SAVE = False  # save the translated document quickly, without compression (--fast-save)
 
 # Supported translators
 TRANSLATORS = {
@@ -23,14 +57,14 @@ TRANSLATORS = {
     'Google': GoogleTranslator,
 }
 
-# Color options
-COLOR_MAP = {
-    "darkred": (0.8, 0, 0),
-    "black": (0, 0, 0),
-    "blue": (0, 0, 0.8),
-    "darkgreen": (0, 0.5, 0),
-    "purple": (0.5, 0, 0.5),
+# Page preview zoom options; pages are downscaled to the column width in the browser anyway
+DISPLAY_QUALITY_OPTIONS = {
+    "Fast": 1.0,
+    "Standard": 1.25,
+    "High": 2.0,
 }
+MAX_PREVIEW_PIXELS = 2400  # longest side of a rendered preview, so posters and maps stay small
+PREVIEW_JPEG_QUALITY = 75
 
 # Target language options for ChatGPT
 LANGUAGE_OPTIONS = {
@@ -97,6 +131,16 @@ def parse_args():
         type=str,
         help='Model name for OpenAI compatible translator'
     )
+    parser.add_argument(
+        '--verify-cache',
+        action='store_true',
+        help='Check cached page translations against the current page text'
+    )
+    parser.add_argument(
+        '--fast-save',
+        action='store_true',
+        help='Save the translated document without compression, e.g. during development'
+    )
     return parser.parse_args()
 
 # Update TRANSLATOR_CONFIG based on command line arguments
@@ -122,127 +166,385 @@ def get_cache_dir():
     cache_dir.mkdir(exist_ok=True)
     return cache_dir
 
-def get_cache_key(doc_info: dict, page_num: int, translator_name: str, target_lang: str, text_content: str):
+def get_cache_key(doc_hash: str, page_num: int, translator_name: str, target_lang: str):
     """Generate cache key for a specific page translation"""
-    # 使用文档信息和页面内容的组合生成唯一标识
-    content_hash = hashlib.md5(text_content.encode('utf-8')).hexdigest()[:8]
-    doc_id = f"{doc_info.get('title', '')}_{doc_info.get('author', '')}_{doc_info.get('pagecount', '')}"
-    doc_hash = hashlib.md5(doc_id.encode('utf-8')).hexdigest()[:8]
-    return f"{doc_hash}_{content_hash}_page{page_num}_{translator_name}_{target_lang}.pdf"
-
-def get_cached_translation(cache_key: str) -> pymupdf.Document:
-    """Get cached translation if exists"""
+    # 使用文档内容哈希和页码生成唯一标识
+    # The page text is determined by the document content, so it does not need hashing on lookup
+    return f"{CACHE_KEY_VERSION}_{doc_hash}_page{page_num}_{translator_name}_{target_lang}.json"
+
+def page_text_hash(blocks) -> str:
+    """Short digest of the text of a page's blocks, used to verify cache entries"""
+    h = hashlib.blake2b(digest_size=8)
+    for block in blocks:
+        h.update(block[4].encode('utf-8'))
+        h.update(b'\n')
+    return h.hexdigest()
+
+@functools.lru_cache(maxsize=PAGE_CACHE_ENTRIES)
+def load_cache_entry(cache_path: str) -> dict:
+    """Read a page cache entry, keeping recently used entries parsed in memory"""
+    with open(cache_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def get_cached_translation(cache_key: str, text_hash: str = None):
+    """Get cached (bbox, translation) blocks of a page if exists.
+
+    When `text_hash` is given, entries made from a different page text are ignored.
+    """
     cache_path = get_cache_dir() / cache_key
     if cache_path.exists():
         try:
-            return pymupdf.open(str(cache_path))
+            entry = load_cache_entry(str(cache_path))
         except Exception as e:
             logging.error(f"Error loading cache: {str(e)}")
             return None
+        if text_hash is not None and entry.get("text_hash") != text_hash:
+            logging.warning(f"Ignoring cache entry {cache_key} made from a different page text")
+            return None
+        return [(tuple(block[:4]), block[4]) for block in entry["blocks"]]
     return None
 
-def save_translation_cache(doc: pymupdf.Document, cache_key: str):
-    """Save translation to cache"""
+def save_translation_cache(cache_key: str, blocks, text_hash: str):
+    """Save (bbox, translation) blocks of a page, and the hash of the text they were made from, to cache"""
     cache_path = get_cache_dir() / cache_key
-    doc.save(str(cache_path))  # 确保提供文件路径字符串
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "text_hash": text_hash,
+            "blocks": [[*bbox, translated] for bbox, translated in blocks],
+        }, f, ensure_ascii=False)
+    # Replace atomically, so other sessions never read a partly written entry
+    if cache_path.exists():
+        load_cache_entry.cache_clear()  # an outdated entry (see --verify-cache) may still be in memory
+    os.replace(tmp_path, cache_path)
+
+def draw_translated_blocks(page, blocks, css):
+    """Cover the original text of each block with white and add its translation in color"""
+    for bbox, translated in blocks:
+        page.draw_rect(bbox, color=None, fill=WHITE)
+        page.insert_htmlbox(bbox, translated, css=css)
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_lock():
+    """Lock serializing pymupdf work between the script and background translation threads"""
+    return threading.Lock()
+
+@st.cache_resource(show_spinner=False)
+def get_translation_memory():
+    """Open the on-disk translation memory, shared across reruns"""
+    conn = sqlite3.connect(str(get_cache_dir() / 'tm.sqlite'), check_same_thread=False)
+    conn.execute("CREATE TABLE IF NOT EXISTS tm (k BLOB PRIMARY KEY, v TEXT)")
+    return conn
+
+@st.cache_resource(show_spinner=False)
+def get_tm_lock():
+    """Lock serializing use of the translation memory connection, which all threads and sessions share"""
+    return threading.Lock()
+
+def tm_key(text: str, src: str, tgt: str, model: str) -> bytes:
+    """Generate translation memory key for a single text"""
+    return hashlib.sha256("\0".join((src, tgt, model, text)).encode('utf-8')).digest()
+
+def tm_get(text: str, src: str, tgt: str, model: str):
+    """Get translation of a text from the translation memory if exists"""
+    key = tm_key(text, src, tgt, model)
+    with get_tm_lock():
+        row = get_translation_memory().execute("SELECT v FROM tm WHERE k = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def tm_put(entries):
+    """Save (key, translation) pairs to the translation memory"""
+    conn = get_translation_memory()
+    with get_tm_lock():
+        conn.executemany("INSERT OR IGNORE INTO tm (k, v) VALUES (?, ?)", entries)
+        conn.commit()
+
+def translate_texts(translator, texts, pool, max_workers=MAX_TRANSLATION_WORKERS):
+    """Translate texts concurrently, with at most `max_workers` requests in flight"""
+    if not texts:
+        return []
+    if isinstance(translator, OpenAICompatibleTranslator):
+        # Concurrent batch prompts on the translator's event loop, so that local servers can batch
+        # them together; its async client keeps its connections across calls
+        return translator.translate_batch_concurrently(texts, max_concurrency=max_workers)
+    return list(pool.map(translator.translate, texts))
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace, so blocks differing only in line breaks or spacing share a translation"""
+    return " ".join(text.split())
+
+def translate_blocks(translator, texts, pool, model, memo, tm_pending, max_workers=MAX_TRANSLATION_WORKERS):
+    """Translate block texts, translating every distinct text only once.
+
+    Texts are compared (and translated) with their whitespace collapsed.
+    Texts without words (see should_translate) are returned as they are.
+    `memo` maps texts to a Future of their translation and is shared by all
+    pages of a run, which may be translated from several threads: the page
+    that first claims a text translates it and the others wait for it. Claimed
+    texts are looked up in the translation memory before being sent to the
+    translator. When the translation fails, the claimed Futures hold the error,
+    so that the pages waiting for them fail with it too.
+    """
+    src, tgt = translator._source, translator._target
+    normalized = [normalize_text(text) for text in texts]
+    translatable = [should_translate(text) for text in normalized]
+    futures = {}  # Future of each distinct text, claimed by this page or another
+    claimed, unique = [], []
+    try:
+        for text in dict.fromkeys(text for text, keep in zip(normalized, translatable) if keep):
+            future = Future()
+            futures[text] = memo.setdefault(text, future)
+            if futures[text] is not future:
+                continue  # claimed by this or another page already
+            claimed.append(text)
+            translated = tm_get(text, src, tgt, model)
+            if translated is None:
+                unique.append(text)
+            else:
+                future.set_result(translated)
+        translations = translate_texts(translator, unique, pool, max_workers)
+    except Exception as e:
+        # Don't leave other pages waiting for texts that will never be translated
+        for text in claimed:
+            if not futures[text].done():
+                futures[text].set_exception(e)
+        raise
+    for text, translated in zip(unique, translations):
+        futures[text].set_result(translated)
+        # Untranslated results (e.g. API errors) are not worth remembering
+        if translated is not None and translated != text:
+            tm_pending.append((tm_key(text, src, tgt, model), str(translated)))
+    return [
+        futures[text].result() if keep else original
+        for original, text, keep in zip(texts, normalized, translatable)
+    ]
+
+def tm_model(translator, translator_name):
+    """Name of the translator and model a translation memory entry belongs to"""
+    return f"{translator_name}:{getattr(translator, 'model', '')}"
+
+def get_page_blocks(doc, page_num):
+    """Extract the text blocks of a page"""
+    return doc[page_num].get_text("blocks", flags=pymupdf.TEXT_DEHYPHENATE)
+
+def prefetch_translations(doc, doc_hash, translator, translator_name, target_lang, progress_callback=None,
+                          max_workers=MAX_TRANSLATION_WORKERS):
+    """Translate the blocks of all uncached pages with concurrent requests into the translation memory.
+
+    Progress is reported to `progress_callback(fraction, message)` when given.
+    """
+    src, tgt = translator._source, translator._target
+    model = tm_model(translator, translator_name)
+    page_texts = {}
+    # pymupdf is not thread-safe: hold the lock for the extraction of each page, not for
+    # translation, so that reruns can render and translate pages in between
+    pdf_lock = get_pdf_lock()
+    for page_num in range(doc.page_count):
+        cache_key = get_cache_key(doc_hash, page_num, translator_name, target_lang)
+        if (get_cache_dir() / cache_key).exists():
+            continue
+        with pdf_lock:
+            blocks = get_page_blocks(doc, page_num)
+        for block in blocks:
+            page_texts[normalize_text(block[4])] = None
+    texts = [
+        text for text in page_texts
+        if should_translate(text) and tm_get(text, src, tgt, model) is None
+    ]
 
-def translate_pdf_pages(doc, doc_bytes, start_page, num_pages, translator, text_color, translator_name, target_lang):
-    """Translate specific pages of a PDF document with progress and caching"""
+    if not texts:
+        return
+    logging.info(f"Prefetching translations of {len(texts)} texts")
+
+    def report(done, total):
+        progress_callback(done / total, f"Translated {done} of {total} texts")
+
+    translations = translator.translate_batch_concurrently(
+        texts,
+        max_concurrency=max_workers,
+        progress_callback=report if progress_callback else None
+    )
+    tm_put([
+        (tm_key(text, src, tgt, model), str(translated))
+        for text, translated in zip(texts, translations)
+        if translated != text
+    ])
+
+def flush_tm_pending(tm_pending):
+    """Save pending translation memory entries, keeping any appended meanwhile by worker threads"""
+    count = len(tm_pending)
+    if count:
+        tm_put(tm_pending[:count])
+        del tm_pending[:count]
+
+def group_pages(translator, pages):
+    """Group the pages translated together.
+
+    Async translators get all pages in one group, so that a single event loop
+    keeps the requests in flight for all of them within the worker limit; the
+    other pages are translated concurrently, one per group.
+    """
+    if isinstance(translator, OpenAICompatibleTranslator):
+        return [pages] if pages else []
+    return [[page] for page in pages]
+
+def translate_page_group(translator, group, pool, model, memo, tm_pending, max_workers=MAX_TRANSLATION_WORKERS):
+    """Translate the blocks of a group of pages, returning the translations of each page"""
+    texts = [block[4] for _, _, blocks, _ in group for block in blocks]
+    translations = iter(translate_blocks(translator, texts, pool, model, memo, tm_pending, max_workers))
+    return [[next(translations) for _ in blocks] for _, _, blocks, _ in group]
+
+def translate_pdf_pages(doc, doc_hash, start_page, num_pages, translator, text_color, translator_name, target_lang, progress_callback=None, max_workers=MAX_TRANSLATION_WORKERS):
+    """Translate specific pages of a PDF document with progress and caching.
+
+    Progress is shown with Streamlit widgets, or reported to
+    `progress_callback(fraction, message)` when given (e.g. off the script thread).
+    `doc_hash` identifies the document content in page cache keys.
+    Returns a new document holding the translated pages in order.
+    """
     # Log translator information
     logging.info(f"Using translator: {translator_name}, source: {translator._source}, target: {translator._target}")
     logging.info(f"Selected translator: {translator_name}, Class: {translator.__class__.__name__}")
     
-    WHITE = pymupdf.pdfcolor["white"]
-    rgb_color = COLOR_MAP.get(text_color.lower(), COLOR_MAP["darkred"])
+    css = CSS_COLOR_MAP.get(text_color.lower(), CSS_COLOR_MAP["darkred"])
     
-    translated_pages = []
-    total_pages = min(start_page + num_pages, doc.page_count) - start_page
+    end_page = min(start_page + num_pages, doc.page_count)
+    total_pages = end_page - start_page
     cache_hits = 0
+    model = tm_model(translator, translator_name)
+    memo = {}
+    tm_pending = []
+    pdf_lock = get_pdf_lock()
     
     # Create a progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    show_widgets = progress_callback is None
+    if show_widgets:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        def progress_callback(fraction, message):
+            if fraction is not None:
+                progress_bar.progress(fraction)
+            if message:
+                status_text.text(message)
+
+    # pymupdf is not thread-safe: hold the lock for document work, not for translation
+    missing_pages = []
+    with pdf_lock:
+        # Translate a single copy of the requested pages in place
+        translated_doc = pymupdf.open()
+        translated_doc.insert_pdf(doc, from_page=start_page, to_page=end_page - 1)
+
+    for i, page_num in enumerate(range(start_page, end_page)):
+        # Check cache first: the page text is only needed to verify it, or on a miss
+        cache_key = get_cache_key(doc_hash, page_num, translator_name, target_lang)
+        # Lock per page so UI reruns can use pymupdf between cached pages
+        with pdf_lock:
+            if CACHE_VERIFY:
+                blocks = get_page_blocks(doc, page_num)
+                cached_blocks = get_cached_translation(cache_key, page_text_hash(blocks))
+            else:
+                blocks = None
+                cached_blocks = get_cached_translation(cache_key)
+            if cached_blocks is not None:
+                # Replay the cached translation onto the copy of the page
+                draw_translated_blocks(translated_doc[i], cached_blocks, css)
+                cache_hits += 1
+                logging.info(f"Cache hit: Using cached translation for page {page_num + 1}")
+            else:
+                if blocks is None:
+                    blocks = get_page_blocks(doc, page_num)
+                missing_pages.append((i, page_num, blocks, cache_key))
+    progress_callback(cache_hits / total_pages, f"Using cached translation for {cache_hits} pages")
     
-    for i, page_num in enumerate(range(start_page, min(start_page + num_pages, doc.page_count))):
-        status_text.text(f"Translating page {page_num + 1}...")
-        
-        # Extract text content for cache key
-        page = doc[page_num]
-        text_content = page.get_text("text")
-        
-        # Check cache first using text content
-        cache_key = get_cache_key(
-            doc.metadata,
-            page_num,
-            translator_name,
-            target_lang,
-            text_content
-        )
-        
-        cached_doc = get_cached_translation(cache_key)
-        
-        if cached_doc is not None:
-            translated_pages.append(cached_doc)
-            cache_hits += 1
-            logging.info(f"Cache hit: Using cached translation for page {page_num + 1}")
-            status_text.text(f"Using cached translation for page {page_num + 1}")
-        else:
-            logging.info(f"Cache miss: Translating page {page_num + 1}")
-            status_text.text(f"Translating page {page_num + 1} (not in cache)")
-            
-            # Create a new PDF document for this page
-            new_doc = pymupdf.open()
-            new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num)
-            page = new_doc[0]
-            
-            # Extract and translate text blocks
-            blocks = page.get_text("blocks", flags=pymupdf.TEXT_DEHYPHENATE)
-            
-            for block in blocks:
-                bbox = block[:4]
-                text = block[4]
-                translated = translator.translate(text)
-                translated = str(translated)  # Ensure the value is a string
-                
-                # Cover original text with white and add translation in color
-                page.draw_rect(bbox, color=None, fill=WHITE)
-                page.insert_htmlbox(
-                    bbox,
-                    translated,
-                    css=f"* {{font-family: sans-serif; color: rgb({int(rgb_color[0]*255)}, {int(rgb_color[1]*255)}, {int(rgb_color[2]*255)});}}"
-                )
-            
-            # Save to cache
-            save_translation_cache(new_doc, cache_key)
-            translated_pages.append(new_doc)
-            logging.info(f"Cached new translation for page {page_num + 1}")
+    # Groups of pages are translated concurrently, and the blocks of each group too
+    groups = group_pages(translator, missing_pages)
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+            ThreadPoolExecutor(max_workers=MAX_PAGE_WORKERS) as page_pool:
+        futures = [
+            page_pool.submit(translate_page_group, translator, group, pool, model, memo, tm_pending, max_workers)
+            for group in groups
+        ]
+        for group, future in zip(groups, futures):
+            progress_callback(None, f"Translating page {group[0][1] + 1} (not in cache)")
+            for (i, page_num, blocks, cache_key), translations in zip(group, future.result()):
+                logging.info(f"Cache miss: Translated page {page_num + 1}")
+                done += 1
+
+                # Ensure the values are strings; blocks without words are left as they are
+                translated_blocks, failed = [], False
+                for block, translated in zip(blocks, translations):
+                    text = normalize_text(block[4])
+                    if should_translate(text):
+                        translated_blocks.append((block[:4], str(translated)))
+                        # Like the translation memory, take untranslated results for API errors
+                        failed = failed or translated is None or translated == text
+                with pdf_lock:
+                    draw_translated_blocks(translated_doc[i], translated_blocks, css)
+
+                # Save to cache, unless some blocks failed: the page is translated again next time
+                if failed:
+                    logging.warning(f"Not caching page {page_num + 1}: some blocks were not translated")
+                else:
+                    save_translation_cache(cache_key, translated_blocks, page_text_hash(blocks))
+                    logging.info(f"Cached new translation for page {page_num + 1}")
+
+                if len(tm_pending) >= TM_COMMIT_BATCH:
+                    flush_tm_pending(tm_pending)
         
-        # Update progress
-        progress = (i + 1) / total_pages
-        progress_bar.progress(progress)
+                # Update progress
+                progress = (cache_hits + done) / total_pages
+                progress_callback(progress, None)
     
+    flush_tm_pending(tm_pending)
+
     # Clear progress indicators and show summary
-    progress_bar.empty()
-    if cache_hits > 0:
-        st.info(f"Used cache for {cache_hits} out of {total_pages} pages")
+    if show_widgets:
+        progress_bar.empty()
+        if cache_hits > 0:
+            st.info(f"Used cache for {cache_hits} out of {total_pages} pages")
     
-    return translated_pages
+    return translated_doc
 
-def get_page_image(page, scale=2):
+def get_page_image(page, scale=1.25):
     """Get high quality image from PDF page"""
     # 计算缩放后的尺寸
-    zoom = scale
+    zoom = min(scale, MAX_PREVIEW_PIXELS / max(page.rect.width, page.rect.height))
     mat = pymupdf.Matrix(zoom, zoom)
     
     # 使用较低分辨率渲染页面，但保持清晰度
     pix = page.get_pixmap(
         matrix=mat,
         alpha=False,
-        colorspace="rgb",  # Use RGB instead of RGBA
+        colorspace=pymupdf.csRGB,  # Use device RGB instead of RGBA
     )
     
     return pix
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_page_image(_doc, doc_hash: str, page_num: int, scale=1.25, output=None):
+    """Render a page of a document to image bytes, cached across reruns and sessions by document hash.
+
+    Unless `output` is given, pages holding pictures or scans are sent as JPEG,
+    and text-only pages as PNG, which keeps small text sharp and compresses well.
+    """
+    with get_pdf_lock():
+        page = _doc[page_num]
+        if output is None:
+            output = "jpeg" if page.get_images() else "png"
+        pix = get_page_image(page, scale)
+        return pix.tobytes(output, jpg_quality=PREVIEW_JPEG_QUALITY)
+
+def scaled_progress(progress_callback, start, end):
+    """Report the progress of a step of a longer task as the range start..end of its progress"""
+    if progress_callback is None:
+        return None
+
+    def callback(fraction, message):
+        progress_callback(None if fraction is None else start + fraction * (end - start), message)
+    return callback
+
 def translate_all_pages(
     input_doc,
     output_doc,
@@ -256,43 +558,68 @@ def translate_all_pages(
     logging.info(f"Starting full document translation with: {kwargs.get('translator_name', 'unknown')}")
     logging.info(f"Translator settings - source: {translator._source}, target: {translator._target}")
     
-    # Define colors
-    WHITE = pymupdf.pdfcolor["white"]
-    rgb_color = COLOR_MAP.get(kwargs.get('text_color', 'darkred').lower(), COLOR_MAP["darkred"])
-    
     total_pages = input_doc.page_count
+    progress_callback = kwargs.get('progress_callback')
     
-    # Create a progress bar for overall progress
-    status_text = st.empty()
-    
+    # Send the blocks of the whole document concurrently when the translator supports it
+    if isinstance(translator, OpenAICompatibleTranslator):
+        prefetch_translations(
+            input_doc,
+            kwargs['doc_hash'],
+            translator,
+            kwargs.get('translator_name', 'google'),
+            kwargs.get('target_lang', 'zh-CN'),
+            scaled_progress(progress_callback, 0, PREFETCH_PROGRESS),
+            kwargs.get('max_workers', MAX_TRANSLATION_WORKERS)
+        )
+        # The pages are then mostly drawn from the translation memory
+        progress_callback = scaled_progress(progress_callback, PREFETCH_PROGRESS, 1)
+
     # Translate all pages using translate_pdf_pages
-    translated_pages = translate_pdf_pages(
+    translated_doc = translate_pdf_pages(
         input_doc,
-        None,  # doc_bytes not needed as we're using text content for cache
+        kwargs['doc_hash'],
         0,  # start from first page
         total_pages,  # translate all pages
         translator,
         kwargs.get('text_color', 'darkred'),
         kwargs.get('translator_name', 'google'),
-        kwargs.get('target_lang', 'zh-CN')
+        kwargs.get('target_lang', 'zh-CN'),
+        progress_callback,
+        kwargs.get('max_workers', MAX_TRANSLATION_WORKERS)
     )
     
     # Combine all pages into one PDF with compression
     output_path = kwargs.get('output_path', 'output.pdf')
-    for trans_doc in translated_pages:
-        output_doc.insert_pdf(trans_doc)
-    
-    # Save with compression options
-    output_doc.save(
-        output_path,
-        garbage=4,
-        deflate=True,
-        clean=True,
-        linear=True
-    )
+    with get_pdf_lock():
+        output_doc.insert_pdf(translated_doc)
+
+        # Save with compression options
+        output_doc.save(output_path, **(FAST_SAVE_OPTIONS if FAST_SAVE else FINAL_SAVE_OPTIONS))
     
     return output_doc
 
+def run_translate_all_job(job, upload_path, translator, **kwargs):
+    """Translate the whole document on a background thread, reporting progress to job["queue"]"""
+    try:
+        with get_pdf_lock():
+            input_doc = pymupdf.open(upload_path)
+            output_doc = pymupdf.open()
+        translate_all_pages(
+            input_doc,
+            output_doc,
+            translator,
+            None,
+            progress_callback=lambda fraction, message: job["queue"].put((fraction, message)),
+            **kwargs
+        )
+        job["output_path"] = kwargs.get('output_path', 'output.pdf')
+    except Exception as e:
+        logging.error(f"Translation error: {str(e)}")
+        job["error"] = str(e)
+    finally:
+        job["done"] = True
+
 def init_session_state():
     """Initialize session state variables"""
     if 'current_page' not in st.session_state:
@@ -307,6 +634,83 @@ def init_session_state():
         st.session_state.previous_file = None
     if 'api_settings' not in st.session_state:
         st.session_state.api_settings = {}
+    if 'translation_running' not in st.session_state:
+        st.session_state.translation_running = False
+    if 'translate_all_job' not in st.session_state:
+        st.session_state.translate_all_job = None
+    if 'translator_cache' not in st.session_state:
+        st.session_state.translator_cache = {}
+    if 'view_cache' not in st.session_state:
+        st.session_state.view_cache = {}
+    if 'view_cache_config' not in st.session_state:
+        st.session_state.view_cache_config = None
+    if 'upload_path' not in st.session_state:
+        st.session_state.upload_path = None
+    if 'upload_hash' not in st.session_state:
+        st.session_state.upload_hash = None
+
+def get_translator(translator_type, source_lang, target_lang_code):
+    """Get the translator for the current settings, reusing it across reruns to keep its connections alive"""
+    api_settings = st.session_state.api_settings
+    if translator_type == "Google":
+        config = (translator_type, source_lang, target_lang_code)
+    else:
+        config = (
+            translator_type,
+            source_lang,
+            target_lang_code,
+            api_settings.get('api_key'),
+            api_settings.get('api_base'),
+            api_settings.get('model')
+        )
+
+    cache = st.session_state.translator_cache
+    if config not in cache:
+        # Drop translators built for previous settings
+        cache.clear()
+        if translator_type == "Google":
+            cache[config] = GoogleTranslator(
+                source=source_lang,
+                target=target_lang_code,
+                # Keep a connection for every worker the slider allows
+                pool_size=TRANSLATION_WORKERS_LIMIT
+            )
+        else:
+            cache[config] = OpenAICompatibleTranslator(
+                source=source_lang,
+                target=target_lang_code,
+                api_key=api_settings.get('api_key'),
+                base_url=api_settings.get('api_base'),
+                model=api_settings.get('model')
+            )
+    return cache[config]
+
+def hash_file_content(data) -> str:
+    """Hex digest identifying a file's content, using blake3 (SIMD, multi-threaded) when installed"""
+    try:
+        import blake3
+    except ImportError:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    return blake3.blake3(data, max_threads=blake3.blake3.AUTO).hexdigest(length=16)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def load_doc(upload_path: str, doc_hash: str) -> pymupdf.Document:
+    """Open an uploaded PDF once and share it across reruns; `doc_hash` identifies its content"""
+    with get_pdf_lock():
+        return pymupdf.open(upload_path)
+
+def save_upload(uploaded_file):
+    """Write the uploaded PDF to a temporary file, returning its content hash and path"""
+    buffer = uploaded_file.getbuffer()
+    upload_hash = hash_file_content(buffer)
+    upload_path = Path(tempfile.gettempdir()) / f"pdf_translator_{upload_hash}.pdf"
+    if not upload_path.exists():
+        # Stream into a temporary file first, so other sessions never open a partial upload
+        with tempfile.NamedTemporaryFile(dir=upload_path.parent, suffix=".pdf", delete=False) as tmp:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, tmp)
+        os.replace(tmp.name, upload_path)
+    return upload_hash, str(upload_path)
 
 def main():
     st.set_page_config(layout="wide", page_title="PDF Translator for Human")
@@ -321,14 +725,19 @@ def main():
         
         uploaded_file = st.file_uploader("Choose a PDF file", type="pdf")
         
-        # Reset session state when a new file is uploaded
+        # Reset session state when a new file is uploaded; compare upload ids rather than
+        # names, so that a new version of the same file replaces the stored upload
         if uploaded_file is not None and (st.session_state.previous_file is None or 
-                                        uploaded_file.name != st.session_state.previous_file):
+                                        uploaded_file.file_id != st.session_state.previous_file):
             st.session_state.current_page = 0
             st.session_state.translation_started = True
             st.session_state.all_translated = False
             st.session_state.translated_doc = None
-            st.session_state.previous_file = uploaded_file.name
+            st.session_state.previous_file = uploaded_file.file_id
+            st.session_state.upload_path = None
+            # Forget a "Translate All" job of the previous file; its thread finishes unobserved
+            st.session_state.translate_all_job = None
+            st.session_state.translation_running = False
             st.rerun()
             
         # Add source language selection
@@ -351,6 +760,21 @@ def main():
             options=list(COLOR_MAP.keys()),
             index=0
         )
+
+        display_quality = st.selectbox(
+            "Display quality",
+            options=list(DISPLAY_QUALITY_OPTIONS.keys()),
+            index=1
+        )
+        display_scale = DISPLAY_QUALITY_OPTIONS[display_quality]
+
+        max_workers = st.slider(
+            "Translation workers",
+            min_value=1,
+            max_value=TRANSLATION_WORKERS_LIMIT,
+            value=MAX_TRANSLATION_WORKERS,
+            help="Number of concurrent translation requests"
+        )
         
         target_lang = st.selectbox(
             "Target Language",
@@ -397,8 +821,11 @@ def main():
 
     # Main content area
     if uploaded_file is not None:
-        doc_bytes = uploaded_file.read()
-        doc = pymupdf.open(stream=doc_bytes)
+        # Open the upload from disk so pymupdf does not need a copy of it in memory
+        if st.session_state.upload_path is None or not os.path.exists(st.session_state.upload_path):
+            st.session_state.upload_hash, st.session_state.upload_path = save_upload(uploaded_file)
+        doc_hash = st.session_state.upload_hash
+        doc = load_doc(st.session_state.upload_path, doc_hash)
         
         # Create two columns for side-by-side display
         col1, col2 = st.columns(2)
@@ -408,9 +835,8 @@ def main():
             st.header("Original")
             for page_num in range(st.session_state.current_page,
                                 min(st.session_state.current_page + pages_per_load, doc.page_count)):
-                page = doc[page_num]
-                pix = get_page_image(page)
-                st.image(pix.tobytes(), caption=f"Page {page_num + 1}", use_container_width=True)
+                image = render_page_image(doc, doc_hash, page_num, display_scale)
+                st.image(image, caption=f"Page {page_num + 1}", use_container_width=True)
         
         # Translation column
         with col2:
@@ -418,37 +844,56 @@ def main():
             
             try:
                 # Initialize translator based on user selection
-                if translator_type == "Google":
-                    translator = GoogleTranslator(
-                        source=source_lang,
-                        target=target_lang_code
-                    )
-                else:
-                    translator = OpenAICompatibleTranslator(
-                        source=source_lang,
-                        target=target_lang_code,
-                        api_key=st.session_state.api_settings.get('api_key'),
-                        base_url=st.session_state.api_settings.get('api_base'),
-                        model=st.session_state.api_settings.get('model')
-                    )
+                translator = get_translator(translator_type, source_lang, target_lang_code)
 
-                # Translate current batch of pages
-                translated_pages = translate_pdf_pages(
-                    doc,
-                    doc_bytes,
-                    st.session_state.current_page,
-                    pages_per_load,
-                    translator,
-                    text_color,
+                # Rendered windows are only valid for the current document and settings
+                view_config = (
+                    doc_hash,
                     translator_type,
-                    target_lang_code
+                    source_lang,
+                    target_lang_code,
+                    text_color,
+                    display_scale,
+                    tuple(sorted(st.session_state.api_settings.items()))
                 )
+                if st.session_state.view_cache_config != view_config:
+                    st.session_state.view_cache = {}
+                    st.session_state.view_cache_config = view_config
+
+                view_key = (st.session_state.current_page, pages_per_load)
+                images = st.session_state.view_cache.get(view_key)
+                if images is None:
+                    # Translate current batch of pages
+                    translated_doc = translate_pdf_pages(
+                        doc,
+                        doc_hash,
+                        st.session_state.current_page,
+                        pages_per_load,
+                        translator,
+                        text_color,
+                        translator_type,
+                        target_lang_code,
+                        max_workers=max_workers
+                    )
+                    # Translated pages are rendered through the same cache as the originals,
+                    # keyed by the settings they were translated with
+                    window_hash = hashlib.blake2b(
+                        repr((view_config, st.session_state.current_page)).encode('utf-8'),
+                        digest_size=16
+                    ).hexdigest()
+                    images = [
+                        render_page_image(translated_doc, window_hash, i, display_scale)
+                        for i in range(translated_doc.page_count)
+                    ]
+
+                    if len(st.session_state.view_cache) >= VIEW_CACHE_SIZE:
+                        # Forget the oldest window
+                        st.session_state.view_cache.pop(next(iter(st.session_state.view_cache)))
+                    st.session_state.view_cache[view_key] = images
                 
                 # Display translated pages
-                for i, trans_doc in enumerate(translated_pages):
-                    page = trans_doc[0]
-                    pix = get_page_image(page)
-                    st.image(pix.tobytes(), caption=f"Page {st.session_state.current_page + i + 1}", use_container_width=True)
+                for i, image in enumerate(images):
+                    st.image(image, caption=f"Page {st.session_state.current_page + i + 1}", use_container_width=True)
             
             except Exception as e:
                 st.error(f"Translation error: {str(e)}")
@@ -483,41 +928,30 @@ def main():
         # Translate All button
         with button_col3:
             if st.button("Translate All", 
-                        disabled=st.session_state.all_translated,
+                        disabled=st.session_state.all_translated or st.session_state.translation_running,
                         use_container_width=True):
                 try:
                     # Initialize translator based on user selection
-                    if translator_type == "Google":
-                        translator = GoogleTranslator(
-                            source=source_lang,
-                            target=target_lang_code
-                        )
-                    else:
-                        translator = OpenAICompatibleTranslator(
-                            source=source_lang,
-                            target=target_lang_code,
-                            api_key=st.session_state.api_settings.get('api_key'),
-                            base_url=st.session_state.api_settings.get('api_base'),
-                            model=st.session_state.api_settings.get('model')
-                        )
-
-                    # Translate all pages
-                    output_doc = pymupdf.open()
-                    output_path = f"translated_{uploaded_file.name}"
-                    output_doc = translate_all_pages(
-                        doc,
-                        output_doc,
-                        translator,
-                        st.empty(),
-                        pages_per_load,
-                        text_color=text_color,
-                        translator_name=translator_type,
-                        target_lang=target_lang_code,
-                        output_path=output_path
-                    )
-                    
-                    st.session_state.all_translated = True
-                    st.session_state.translated_doc = output_path
+                    translator = get_translator(translator_type, source_lang, target_lang_code)
+
+                    # Translate all pages on a background thread, keeping reruns responsive
+                    job = {"queue": queue.Queue(), "progress": 0.0, "status": "Starting translation...", "done": False,
+                           "doc_hash": doc_hash}
+                    threading.Thread(
+                        target=run_translate_all_job,
+                        args=(job, st.session_state.upload_path, translator),
+                        kwargs=dict(
+                            doc_hash=doc_hash,
+                            text_color=text_color,
+                            translator_name=translator_type,
+                            target_lang=target_lang_code,
+                            output_path=f"translated_{uploaded_file.name}",
+                            max_workers=max_workers
+                        ),
+                        daemon=True
+                    ).start()
+                    st.session_state.translate_all_job = job
+                    st.session_state.translation_running = True
                     st.rerun()
                 except Exception as e:
                     st.error(f"Translation error: {str(e)}")
@@ -544,6 +978,34 @@ def main():
                         mime="application/pdf",
                         use_container_width=True
                     )
+
+        # Poll the background "Translate All" job
+        if st.session_state.translation_running:
+            job = st.session_state.translate_all_job
+            while not job["queue"].empty():
+                fraction, message = job["queue"].get_nowait()
+                if fraction is not None:
+                    job["progress"] = fraction
+                if message:
+                    job["status"] = message
+
+            if job["doc_hash"] != doc_hash:
+                # The job translated another file
+                st.session_state.translation_running = False
+                st.session_state.translate_all_job = None
+            elif job["done"]:
+                st.session_state.translation_running = False
+                st.session_state.translate_all_job = None
+                if "error" in job:
+                    st.error(f"Translation error: {job['error']}")
+                else:
+                    st.session_state.all_translated = True
+                    st.session_state.translated_doc = job["output_path"]
+                    st.rerun()
+            else:
+                st.progress(job["progress"], text=job["status"])
+                time.sleep(0.5)
+                st.rerun()
     else:
         st.info("Please upload a PDF file to begin translation")
 
@@ -560,8 +1022,16 @@ def main():
     # 使用OpenAI翻译并指定API base：
     # python app.py --translator openai --api-base https://api.openai.com/v1 --model gpt-4o-mini --api-key sk-xxx
 
+    # 校验缓存的页面翻译是否与当前页面文本一致：
+    # python app.py --verify-cache
+
+    # 快速保存翻译后的文档（不压缩，适合开发调试）：
+    # python app.py --fast-save
+
 
 if __name__ == "__main__":
     args = parse_args()
     update_translator_config(args)
+    CACHE_VERIFY = args.verify_cache
+    FAST_SAVE = args.fast_save
     main() 
\ No newline at end of file
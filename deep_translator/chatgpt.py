@@ -41,30 +41,34 @@ class ChatGptTranslator(BaseTranslator):
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
+        self._client = None
 
         super().__init__(source=source, target=target, **kwargs)
 
-    def translate(self, text: str, **kwargs) -> str:
+    def _get_client(self):
         """
-        @param text: text to translate
-        @return: translated text
+        create the openai client on first use and reuse it afterwards,
+        so that its connections are kept alive between requests
+        @return: openai client
         """
-        import openai
-
-        client = openai.OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url if self.base_url else None
-        )
+        if self._client is None:
+            import openai
 
-        prompt = f"""
-        Provide your translation '{text}' from {self.source} to {self.target} in JSON format with the following structure:
+            self._client = openai.OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url if self.base_url else None
+            )
+        return self._client
 
-        {{ "text": string }}
+    def _completion_params(self, prompt: str) -> dict:
+        """
+        build the parameters of a chat completions request
+        @param prompt: prompt to send
+        @return: keyword arguments for chat.completions.create
         """
-
         # if model is empty (for mlx_lm.server, the model should be default_model)
         # export OPENAI_MODEL=default_model
-        response = client.chat.completions.create(
+        return dict(
             model=self.model if self.model else "default_model",
             messages=[
                 {
@@ -75,18 +79,91 @@ class ChatGptTranslator(BaseTranslator):
             response_format={"type": "json_object"}
         )
 
+    def _complete(self, prompt: str) -> str:
+        """
+        send a single prompt to the chat completions api
+        @param prompt: prompt to send
+        @return: raw content of the first choice
+        """
+        response = self._get_client().chat.completions.create(
+            **self._completion_params(prompt)
+        )
+        return response.choices[0].message.content
+
+    def _translation_prompt(self, text: str) -> str:
+        return f"""
+        Provide your translation '{text}' from {self.source} to {self.target} in JSON format with the following structure:
+
+        {{ "text": string }}
+        """
+
+    def _parse_translation(self, content: str) -> str:
         try:
-            return json.loads(response.choices[0].message.content).get("text")
+            return json.loads(content).get("text")
         except Exception:
             # if the response is not a valid json
-            return response.choices[0].message.content
+            return content
+
+    def translate(self, text: str, **kwargs) -> str:
+        """
+        @param text: text to translate
+        @return: translated text
+        """
+        content = self._complete(self._translation_prompt(text))
+        return self._parse_translation(content)
 
     def translate_file(self, path: str, **kwargs) -> str:
         return self._translate_file(path, **kwargs)
 
+    def _batch_prompt(self, batch: List[str]) -> str:
+        return f"""
+        Translate each item of the following JSON array from {self.source} to {self.target}:
+
+        {json.dumps(batch, ensure_ascii=False)}
+
+        Provide your translations in JSON format with the following structure,
+        keeping the same number of items in the same order:
+
+        {{ "translations": [string] }}
+        """
+
+    def _parse_batch(
+        self, content: str, batch: List[str]
+    ) -> Optional[List[str]]:
+        """
+        parse the response to a batch prompt
+        @param content: raw content of the response
+        @param batch: texts of the batch prompt
+        @return: list of translations, or None if the response is not
+        a valid json or does not hold one translation per text
+        """
+        try:
+            translations = json.loads(content).get("translations")
+        except Exception:
+            # if the response is not a valid json
+            return None
+
+        if (
+            not isinstance(translations, list)
+            or len(translations) != len(batch)
+            or not all(isinstance(t, str) for t in translations)
+        ):
+            return None
+        return translations
+
     def translate_batch(self, batch: List[str], **kwargs) -> List[str]:
         """
+        translate all texts of the batch with a single request, falling back
+        to one request per text if the response can not be parsed
         @param batch: list of texts to translate
         @return: list of translations
         """
-        return self._translate_batch(batch, **kwargs)
+        if not batch:
+            raise Exception("Enter your text list that you want to translate")
+
+        translations = self._parse_batch(
+            self._complete(self._batch_prompt(batch)), batch
+        )
+        if translations is None:
+            return self._translate_batch(batch, **kwargs)
+        return translations
@@ -8,6 +8,7 @@ from typing import List, Optional
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
 from deep_translator.base import BaseTranslator
 from deep_translator.constants import BASE_URLS
@@ -18,6 +19,9 @@ from deep_translator.exceptions import (
 )
 from deep_translator.validate import is_empty, is_input_valid, request_failed
 
+# default number of connections kept open per host
+POOL_SIZE = 16
+
 
 class GoogleTranslator(BaseTranslator):
     """
@@ -29,11 +33,14 @@ class GoogleTranslator(BaseTranslator):
         source: str = "auto",
         target: str = "en",
         proxies: Optional[dict] = None,
+        pool_size: int = POOL_SIZE,
         **kwargs
     ):
         """
         @param source: source language to translate from
         @param target: target language to translate to
+        @param pool_size: connections kept open for reuse, at least the
+        number of requests sent concurrently
         """
         self.proxies = proxies
         super().__init__(
@@ -48,6 +55,14 @@ class GoogleTranslator(BaseTranslator):
 
         self._alt_element_query = {"class": "result-container"}
 
+        # reuse connections (and their TLS handshakes) across requests
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
     def translate(self, text: str, **kwargs) -> str:
         """
         function to translate a text
@@ -61,11 +76,14 @@ class GoogleTranslator(BaseTranslator):
             self._url_params["tl"] = self._target
             self._url_params["sl"] = self._source
 
+            # keep the payload out of the shared url params, so that
+            # the same translator can be used from several threads
+            params = dict(self._url_params)
             if self.payload_key:
-                self._url_params[self.payload_key] = text
+                params[self.payload_key] = text
 
-            response = requests.get(
-                self._base_url, params=self._url_params, proxies=self.proxies
+            response = self._session.get(
+                self._base_url, params=params, proxies=self.proxies
             )
             if response.status_code == 429:
                 raise TooManyRequests()
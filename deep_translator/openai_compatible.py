@@ -1,11 +1,17 @@
+import asyncio
 import json
+import threading
 import time
+import weakref
 import os,logging
 
 import streamlit as st
 from .chatgpt import ChatGptTranslator
 
-logging.basicConfig(filename='application.log', level=logging.INFO, format='%(asctime)s - %(levelname)-5s %(lineno)d %(filename)s:%(funcName)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BATCH_TEXTS = 50  # texts sent in a single batch prompt
+BATCH_MAX_CHARS = 8000  # characters sent in a single batch prompt
 
 class OpenAICompatibleTranslator(ChatGptTranslator):
     """Translator that handles OpenAI compatible APIs with better error handling"""
@@ -13,6 +19,10 @@ class OpenAICompatibleTranslator(ChatGptTranslator):
         super().__init__(source=source, target=target, **kwargs)
         self.retry_count = 3
         self.retry_delay = 1  # seconds
+        # Event loop thread and async client of translate_batch_concurrently
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._async_client = None
 
     def translate(self, text: str, **kwargs) -> str:
         """
@@ -23,16 +33,172 @@ class OpenAICompatibleTranslator(ChatGptTranslator):
 
         for attempt in range(self.retry_count):
             try:
-                logging.info(f"Request OpenAI compatible api, base_url: {self.base_url}")
+                logger.info(f"Request OpenAI compatible api, base_url: {self.base_url}")
                 return super().translate(text, **kwargs)
             except json.JSONDecodeError:
-                logging.warn(f"Translation API response JSONDecodeError, will retry later...")
+                logger.warning(f"Translation API response JSONDecodeError, will retry later...")
                 if attempt == self.retry_count - 1:
-                    logging.error(f"Translation API response error, using original text")
+                    logger.error(f"Translation API response error, using original text")
                     st.warning(f"Translation API response error, using original text")
                     return text
                 time.sleep(self.retry_delay)
             except Exception as e:
-                logging.error(f"Translation error: {str(e)}")
+                logger.error(f"Translation error: {str(e)}")
                 st.error(f"Translation error: {str(e)}")
-                return text 
\ No newline at end of file
+                return text
+
+    async def _acomplete(self, client, semaphore, prompt):
+        """
+        Send a prompt with the async client, waiting for the semaphore so that
+        only a limited number of requests are in flight, and retrying failed
+        requests like translate
+        """
+        for attempt in range(self.retry_count):
+            try:
+                async with semaphore:
+                    response = await client.chat.completions.create(
+                        **self._completion_params(prompt)
+                    )
+                return response.choices[0].message.content
+            except Exception as e:
+                if attempt == self.retry_count - 1:
+                    raise
+                logger.warning(f"Translation error: {str(e)}, will retry later...")
+                await asyncio.sleep(self.retry_delay)
+
+    async def _atranslate_one(self, client, semaphore, text):
+        """
+        Translate a single text with the async client, returning the original
+        text if its request fails
+        """
+        if not text.strip():
+            return text
+
+        try:
+            content = await self._acomplete(client, semaphore, self._translation_prompt(text))
+        except Exception as e:
+            logger.error(f"Translation error: {str(e)}, using original text")
+            return text
+        result = self._parse_translation(content)
+        return text if result is None else result
+
+    async def _atranslate_group(self, client, semaphore, group):
+        """
+        Translate a group of texts with a single batch prompt, falling back to
+        one request per text if the request fails or its response can not be parsed
+        """
+        if len(group) > 1:
+            try:
+                content = await self._acomplete(client, semaphore, self._batch_prompt(group))
+                translations = self._parse_batch(content, group)
+            except Exception as e:
+                logger.warning(f"Batch translation error: {str(e)}, translating texts one by one")
+                translations = None
+            if translations is not None:
+                return translations
+        return await asyncio.gather(
+            *[self._atranslate_one(client, semaphore, text) for text in group]
+        )
+
+    @staticmethod
+    def _group_texts(texts, max_texts, max_chars):
+        """
+        Split texts in groups of up to max_texts texts and about max_chars
+        characters, each sent in a single batch prompt
+        """
+        groups, group, length = [], [], 0
+        for text in texts:
+            if group and (len(group) >= max_texts or length + len(text) > max_chars):
+                groups.append(group)
+                group, length = [], 0
+            group.append(text)
+            length += len(text)
+        if group:
+            groups.append(group)
+        return groups
+
+    def _get_loop(self):
+        """
+        Start the event loop thread of the translator on first use. It runs
+        until the translator is garbage collected, so that the async client
+        and its connections live across calls.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="openai-compatible-loop", daemon=True).start()
+                weakref.finalize(self, loop.call_soon_threadsafe, loop.stop)
+                self._loop = loop
+        return self._loop
+
+    def _get_async_client(self):
+        """
+        Create the async client on first use and reuse it afterwards; only
+        called on the translator's event loop, which its connections belong to
+        """
+        if self._async_client is None:
+            import openai
+
+            self._async_client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url if self.base_url else None
+            )
+        return self._async_client
+
+    def translate_batch_concurrently(self, batch, **kwargs):
+        """
+        Run atranslate_batch on the translator's event loop thread, which
+        reuses a single async client, and wait for its result. Takes the
+        keyword arguments of atranslate_batch.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self.atranslate_batch(batch, **kwargs), self._get_loop()
+        ).result()
+
+    async def atranslate_batch(self, batch, max_concurrency=32, progress_callback=None,
+                               batch_texts=BATCH_TEXTS, batch_chars=BATCH_MAX_CHARS):
+        """
+        Translate a batch of texts with concurrent batch prompts of up to
+        batch_texts texts and about batch_chars characters, so that servers
+        batching requests (vLLM, mlx_lm.server...) can process them together.
+        Texts whose request fails are returned untranslated.
+        progress_callback(done, total) is called with the number of texts
+        translated as each batch prompt completes.
+        """
+        if asyncio.get_running_loop() is self._loop:
+            return await self._atranslate_batch(
+                self._get_async_client(), batch, max_concurrency, progress_callback, batch_texts, batch_chars
+            )
+
+        import openai
+
+        # On another event loop, a client is created for the run: its connections belong to the loop
+        async with openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url if self.base_url else None
+        ) as client:
+            return await self._atranslate_batch(
+                client, batch, max_concurrency, progress_callback, batch_texts, batch_chars
+            )
+
+    async def _atranslate_batch(self, client, batch, max_concurrency, progress_callback, batch_texts, batch_chars):
+        """Translate a batch of texts with the given async client, see atranslate_batch"""
+        # Blank texts are returned as they are, without a request
+        texts = list(dict.fromkeys(text for text in batch if text.strip()))
+        groups = self._group_texts(texts, batch_texts, batch_chars)
+        translated = {}
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def translate_group(group):
+            return group, await self._atranslate_group(client, semaphore, group)
+
+        done = 0
+        for future in asyncio.as_completed([translate_group(group) for group in groups]):
+            group, translations = await future
+            translated.update(zip(group, translations))
+            done += len(group)
+            if progress_callback:
+                progress_callback(done, len(texts))
+
+        return [translated.get(text, text) for text in batch]
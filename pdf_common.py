@@ -0,0 +1,44 @@
+"""
+Settings and helpers shared by the web app (app.py) and the command line tool (translator_cli.py)
+
+This module must not import streamlit, so that the command line tool does not load it.
+"""
+import re
+import pymupdf
+
+# Blocks made of a single URL, DOI or email address are kept as they are
+NO_TRANSLATE_RE = re.compile(
+    r'(?:https?://|www\.)\S+|doi:\s*\S+|10\.\d{4,9}/\S+|[\w.+-]+@[\w-]+(?:\.[\w-]+)+',
+    re.IGNORECASE
+)
+MIN_TRANSLATE_CHARS = 2  # shorter blocks are kept as they are; two characters can be a CJK word
+
+def should_translate(text: str) -> bool:
+    """Check whether a block holds any words, as opposed to page numbers, punctuation,
+    whitespace, or language-invariant text such as URLs, DOIs and email addresses"""
+    text = text.strip()
+    return (
+        len(text) >= MIN_TRANSLATE_CHARS
+        and any(c.isalpha() for c in text)
+        and NO_TRANSLATE_RE.fullmatch(text) is None
+    )
+
+# Color options
+WHITE = pymupdf.pdfcolor["white"]  # covers the original text
+COLOR_MAP = {
+    "darkred": (0.8, 0, 0),
+    "black": (0, 0, 0),
+    "blue": (0, 0, 0.8),
+    "darkgreen": (0, 0.5, 0),
+    "purple": (0.5, 0, 0.5),
+}
+# CSS of the translated text for each color, passed to insert_htmlbox
+CSS_COLOR_MAP = {
+    name: f"* {{font-family: sans-serif; color: rgb({int(r*255)}, {int(g*255)}, {int(b*255)});}}"
+    for name, (r, g, b) in COLOR_MAP.items()
+}
+
+# Options of the saved document: compact and linearized for final documents of the app,
+# quick to write otherwise (--fast-save); translator_cli has its own final options
+FINAL_SAVE_OPTIONS = dict(garbage=4, deflate=True, clean=True, linear=True)
+FAST_SAVE_OPTIONS = dict(garbage=1, deflate=False)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+"""Tests for `deep_translator` package."""
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from deep_translator import ChatGptTranslator, exceptions
+
+
+@pytest.fixture
+def chatgpt_translator():
+    return ChatGptTranslator(api_key="an_api_key", source="en", target="fr")
+
+
+def test_chatgpt_api_key_missing():
+    with pytest.raises(exceptions.ApiKeyException):
+        ChatGptTranslator(api_key="", source="en", target="fr")
+
+
+@patch.object(ChatGptTranslator, "_complete")
+def test_translate_batch_single_request(mock_complete, chatgpt_translator):
+    mock_complete.return_value = '{"translations": ["bonjour", "au revoir"]}'
+    assert chatgpt_translator.translate_batch(["hello", "goodbye"]) == [
+        "bonjour",
+        "au revoir",
+    ]
+    assert mock_complete.call_count == 1
+
+
+@patch.object(ChatGptTranslator, "_complete")
+def test_translate_batch_fallback(mock_complete, chatgpt_translator):
+    # the batched response has the wrong number of items,
+    # so every text is translated on its own
+    mock_complete.side_effect = [
+        '{"translations": ["bonjour"]}',
+        '{"text": "bonjour"}',
+        '{"text": "au revoir"}',
+    ]
+    assert chatgpt_translator.translate_batch(["hello", "goodbye"]) == [
+        "bonjour",
+        "au revoir",
+    ]
+    assert mock_complete.call_count == 3
+
+
+def test_client_is_reused():
+    translator = ChatGptTranslator(
+        api_key="an_api_key",
+        base_url="http://localhost:8080/v1",
+        source="en",
+        target="fr",
+    )
+    fake_openai = MagicMock()
+    with patch.dict(sys.modules, {"openai": fake_openai}):
+        assert translator._get_client() is translator._get_client()
+    fake_openai.OpenAI.assert_called_once_with(
+        api_key="an_api_key", base_url="http://localhost:8080/v1"
+    )
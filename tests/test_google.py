@@ -2,6 +2,8 @@
 
 """Tests for `deep_translator` package."""
 
+from unittest.mock import Mock, patch
+
 import pytest
 
 from deep_translator import GoogleTranslator, exceptions
@@ -60,3 +62,20 @@ def test_one_character_words():
     assert (
         GoogleTranslator(source="es", target="en").translate("o") is not None
     )
+
+
+def test_session_reused(google_translator):
+    response = Mock(status_code=200, text='<div class="t0">hello</div>')
+    with patch.object(
+        google_translator._session, "get", return_value=response
+    ) as mock_get:
+        assert google_translator.translate("hallo") == "hello"
+        assert google_translator.translate("salut") == "hello"
+    assert mock_get.call_count == 2
+    assert mock_get.call_args[1]["params"]["q"] == "salut"
+
+
+def test_pool_size():
+    translator = GoogleTranslator(target="en", pool_size=32)
+    adapter = translator._session.get_adapter("https://translate.google.com")
+    assert adapter._pool_maxsize == 32
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+"""Tests for the async batches of OpenAICompatibleTranslator."""
+
+import asyncio
+import sys
+
+import pytest
+
+if sys.version_info < (3, 8):
+    pytest.skip("AsyncMock needs Python 3.8+", allow_module_level=True)
+
+# openai_compatible reports errors in the Streamlit app
+pytest.importorskip("streamlit")
+
+from unittest.mock import AsyncMock, MagicMock, patch  # noqa: E402
+
+from deep_translator.openai_compatible import (  # noqa: E402
+    OpenAICompatibleTranslator,
+)
+
+
+@patch.object(OpenAICompatibleTranslator, "_acomplete", new_callable=AsyncMock)
+def test_atranslate_batch_groups_texts(mock_acomplete):
+    translator = OpenAICompatibleTranslator(
+        api_key="an_api_key", source="en", target="fr"
+    )
+    mock_acomplete.side_effect = [
+        '{"translations": ["bonjour", "au revoir"]}',
+        '{"text": "merci"}',
+    ]
+    with patch.dict(sys.modules, {"openai": MagicMock()}):
+        translations = asyncio.run(
+            translator.atranslate_batch(
+                ["hello", " ", "goodbye", "thanks"], batch_texts=2
+            )
+        )
+    assert translations == ["bonjour", " ", "au revoir", "merci"]
+    assert mock_acomplete.call_count == 2
+
+
+@patch.object(OpenAICompatibleTranslator, "_acomplete", new_callable=AsyncMock)
+def test_async_client_is_reused(mock_acomplete):
+    translator = OpenAICompatibleTranslator(
+        api_key="an_api_key", source="en", target="fr"
+    )
+    mock_acomplete.side_effect = [
+        '{"translations": ["bonjour", "au revoir"]}',
+        '{"translations": ["merci", "oui"]}',
+    ]
+    fake_openai = MagicMock()
+    with patch.dict(sys.modules, {"openai": fake_openai}):
+        assert translator.translate_batch_concurrently(
+            ["hello", "goodbye"]
+        ) == ["bonjour", "au revoir"]
+        assert translator.translate_batch_concurrently(["thanks", "yes"]) == [
+            "merci",
+            "oui",
+        ]
+    fake_openai.AsyncOpenAI.assert_called_once_with(
+        api_key="an_api_key", base_url=None
+    )
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""Tests for the block filtering shared by app.py and translator_cli."""
+
+import pytest
+
+# pdf_common holds the colors of pymupdf, which only the app requirements
+# install
+pytest.importorskip("pymupdf")
+
+from pdf_common import MIN_TRANSLATE_CHARS, should_translate  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "This is a sentence.",
+        "  Introduction\n",
+        "Figure 3 shows 42 results",
+        "中文",
+    ],
+)
+def test_should_translate_prose(text):
+    assert should_translate(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["12", "3.14", "2021-05-17", " 7 ", "(12)", "   ", "- 5 -"],
+)
+def test_numbers_and_punctuation_kept(text):
+    assert not should_translate(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "https://example.com/paper.pdf",
+        "www.example.org",
+        "doi: 10.1000/xyz123",
+        "10.1038/nature12373",
+        "jane.doe@example.com",
+        " jane.doe@example.com\n",
+    ],
+)
+def test_urls_dois_emails_kept(text):
+    assert not should_translate(text)
+
+
+def test_urls_in_prose_translated():
+    assert should_translate("See https://example.com for details")
+
+
+def test_short_blocks_kept():
+    assert not should_translate("a" * (MIN_TRANSLATE_CHARS - 1))
+    assert should_translate("a" * MIN_TRANSLATE_CHARS)
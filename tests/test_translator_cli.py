@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+"""Tests for the merged requests and translation cache of translator_cli."""
+
+import argparse
+import time
+
+import pytest
+
+# translator_cli draws with pymupdf, which only the app requirements install
+pytest.importorskip("pymupdf")
+
+from translator_cli import (  # noqa: E402
+    MERGE_SEPARATOR,
+    PartialTranslationError,
+    encoded_length,
+    get_cached,
+    merge_texts,
+    open_cache,
+    positive_int,
+    put_cached,
+    translate_cached,
+    translate_merged,
+    translate_texts,
+)
+
+
+class StubTranslator:
+    """Translates by upper-casing, recording the texts it was sent"""
+
+    def __init__(self, fail_merged=False, drop_separators=False, fail_on=None):
+        self.fail_merged = fail_merged
+        self.drop_separators = drop_separators
+        self.fail_on = fail_on
+        self.requests = []
+
+    def translate(self, text):
+        self.requests.append(text)
+        if text == self.fail_on:
+            raise ValueError("too many requests")
+        if MERGE_SEPARATOR in text:
+            if self.fail_merged:
+                raise ValueError("request too long")
+            if self.drop_separators:
+                text = text.replace(MERGE_SEPARATOR, " ")
+        return text.upper()
+
+
+class NoneTranslator:
+    """Returns nothing, as translators do for some texts"""
+
+    def translate(self, text):
+        return None
+
+
+@pytest.fixture
+def cache():
+    conn = open_cache(":memory:")
+    yield conn
+    conn.close()
+
+
+def test_merge_texts_fits():
+    assert merge_texts(["a", "b", "c"]) == [["a", "b", "c"]]
+
+
+def test_merge_texts_splits_by_encoded_length():
+    separator_length = encoded_length(MERGE_SEPARATOR)
+    chunks = merge_texts(
+        ["a" * 10, "b" * 10, "c" * 10], max_length=20 + separator_length
+    )
+    assert chunks == [["a" * 10, "b" * 10], ["c" * 10]]
+
+    # each CJK character takes 9 characters once URL-encoded
+    chunks = merge_texts(
+        ["中" * 10, "文" * 10], max_length=100 + separator_length
+    )
+    assert chunks == [["中" * 10], ["文" * 10]]
+
+
+def test_merge_texts_long_text():
+    assert merge_texts(["a", "b" * 50, "c"], max_length=10) == [
+        ["a"],
+        ["b" * 50],
+        ["c"],
+    ]
+
+
+def test_translate_merged_fits():
+    translator = StubTranslator()
+    assert translate_merged(translator, ["a", "b", "c"]) == ["A", "B", "C"]
+    assert len(translator.requests) == 1
+
+
+@pytest.mark.parametrize(
+    "translator",
+    [StubTranslator(drop_separators=True), StubTranslator(fail_merged=True)],
+    ids=["mismatched separators", "exception"],
+)
+def test_translate_merged_falls_back(translator):
+    assert translate_merged(translator, ["a", "b", "c"]) == ["A", "B", "C"]
+    assert translator.requests[1:] == ["a", "b", "c"]
+
+
+def test_translate_merged_partial():
+    translator = StubTranslator(fail_merged=True, fail_on="c")
+    with pytest.raises(PartialTranslationError) as e:
+        translate_merged(translator, ["a", "b", "c", "d"])
+    assert e.value.translations == ["A", "B"]
+    assert isinstance(e.value.__cause__, ValueError)
+
+
+def test_translate_texts_keeps_partial_translations():
+    translator = StubTranslator(fail_merged=True, fail_on="c")
+    translations = []
+    with pytest.raises(ValueError):
+        for pair in translate_texts(translator, ["a", "b", "c", "d"]):
+            translations.append(pair)
+    assert translations == [("a", "A"), ("b", "B")]
+
+
+def test_cache_ttl(cache):
+    put_cached(cache, "fresh", "FRESH")
+    cache.execute(
+        "INSERT INTO translations (key, value, ts) VALUES (?, ?, ?)",
+        ("old", "OLD", int(time.time() - 3 * 86400)),
+    )
+    assert get_cached(cache, "fresh", 1) == "FRESH"
+    assert get_cached(cache, "old", 1) is None
+    assert get_cached(cache, "old", 5) == "OLD"
+
+
+def test_cache_ttl_zero_bypasses_cache(cache):
+    put_cached(cache, "a", "cached")
+    assert get_cached(cache, "a", 0) is None
+
+    translator = StubTranslator()
+    translations = translate_cached(cache, translator, ["a"], str, 0)
+    assert translations == {"a": "A"}
+    assert translator.requests == ["a"]
+
+
+def test_translate_cached_reuses_cache(cache):
+    put_cached(cache, "a", "cached")
+    translator = StubTranslator()
+    translations = translate_cached(cache, translator, ["a", "b"], str, 30)
+    assert translations == {"a": "cached", "b": "B"}
+    assert translator.requests == ["b"]
+
+
+def test_none_not_cached(cache):
+    put_cached(cache, "a", None)
+    assert get_cached(cache, "a", 30) is None
+
+    translations = translate_cached(cache, NoneTranslator(), ["b"], str, 30)
+    assert translations == {"b": None}
+    assert (
+        cache.execute("SELECT COUNT(*) FROM translations").fetchone()[0] == 0
+    )
+
+
+def test_translations_before_failure_committed(cache):
+    translator = StubTranslator(fail_merged=True, fail_on="c")
+    with pytest.raises(ValueError):
+        translate_cached(cache, translator, ["a", "b", "c", "d"], str, 30)
+    # a rollback drops what was not committed
+    cache.rollback()
+    assert get_cached(cache, "a", 30) == "A"
+    assert get_cached(cache, "b", 30) == "B"
+    assert get_cached(cache, "c", 30) is None
+
+    # running again only translates the texts left
+    translator = StubTranslator()
+    translations = translate_cached(
+        cache, translator, ["a", "b", "c", "d"], str, 30
+    )
+    assert translations == {"a": "A", "b": "B", "c": "C", "d": "D"}
+    assert translator.requests == [MERGE_SEPARATOR.join(["c", "d"])]
+
+
+def test_positive_int():
+    assert positive_int("4") == 4
+    for value in ("0", "-2"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            positive_int(value)
@@ -1,9 +1,25 @@
+import os
+import time
+import hashlib
+import sqlite3
 import argparse
+import urllib.parse
+import functools
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import pymupdf
 from deep_translator import (
     GoogleTranslator,
     ChatGptTranslator,
 )
+from pdf_common import (
+    COLOR_MAP,
+    CSS_COLOR_MAP,
+    FAST_SAVE_OPTIONS,
+    WHITE,
+    should_translate,
+)
 
 # Map of supported translators
 TRANSLATORS = {
@@ -11,8 +27,430 @@ TRANSLATORS = {
     'chatgpt': ChatGptTranslator,
 }
 
+# Translations of earlier runs, shared by all documents
+CACHE_PATH = os.path.expanduser("~/.deep_translator_cache.db")
+DEFAULT_CACHE_TTL = 30  # days
+DEFAULT_WORKERS = 8  # concurrent translation requests
+
+# Consecutive texts are joined with a separator and translated in one request
+MERGE_SEPARATOR = "\n<<<SEP>>>\n"
+# Size of a merged request, measured URL-encoded as it is sent (a CJK character takes 9), which
+# keeps it below the 5000 characters Google Translate accepts and the length of a GET request
+MERGE_MAX_LENGTH = 4000
+BATCH_TEXTS = 50  # texts sent in a single ChatGPT batch prompt
+CHECKPOINT_TEXTS = 100  # new translations committed to the cache at a time, for interrupted runs
+
+# Final saves are compact but not linearized: the file is not served over the web,
+# and linearizing costs an extra pass over the whole document
+CLI_SAVE_OPTIONS = dict(garbage=4, deflate=True, clean=True)
+
+# How the pages are drawn: after translating the whole document (batch), while
+# translating (stream), or split across worker processes
+STRATEGIES = ('auto', 'batch', 'stream', 'processes')
+STREAM_MIN_PAGES = 10  # smaller documents are quick to extract and draw anyway
+PROCESSES_MIN_PAGES = 200  # smaller documents are drawn before a pool would have started
+
+def choose_strategy(page_count: int, processes: int, batch_requests: bool) -> str:
+    """
+    Pick the strategy used by --strategy auto for a document of page_count pages
+
+    batch_requests tells whether the translator sends texts in batches, which
+    streaming would break into one request per text.
+    """
+    if page_count > PROCESSES_MIN_PAGES and processes > 1:
+        return 'processes'
+    if page_count > STREAM_MIN_PAGES and not batch_requests:
+        return 'stream'
+    return 'batch'
+
+def get_blocks(page, textflags):
+    """Text blocks of a page worth translating; the others are left as they are"""
+    return [block for block in page.get_text("blocks", flags=textflags) if should_translate(block[4])]
+
+def open_cache(path: str = CACHE_PATH) -> sqlite3.Connection:
+    """Open the on-disk translation cache, creating it if needed"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)")
+    return conn
+
+def cache_key(source_lang: str, target_lang: str, translator_name: str, text: str) -> str:
+    """Key of a text's translation in the cache"""
+    return hashlib.sha1(f"{source_lang}|{target_lang}|{translator_name}|{text}".encode('utf-8')).hexdigest()
+
+def encoded_length(text: str) -> int:
+    """Length of text once URL-encoded in a request"""
+    return len(urllib.parse.quote_plus(text))
+
+def merge_texts(texts, max_length=MERGE_MAX_LENGTH):
+    """
+    Group consecutive texts into chunks of at most max_length URL-encoded
+    characters once joined with MERGE_SEPARATOR
+
+    A text longer than max_length gets a chunk of its own.
+    """
+    separator_length = encoded_length(MERGE_SEPARATOR)
+    chunks, chunk_length = [], max_length
+    for text in texts:
+        length = encoded_length(text)
+        if chunks and chunk_length + separator_length + length <= max_length:
+            chunks[-1].append(text)
+            chunk_length += separator_length + length
+        else:
+            chunks.append([text])
+            chunk_length = length
+    return chunks
+
+class PartialTranslationError(Exception):
+    """A chunk of texts failed part way: translations holds those of its first texts, the cause is the error"""
+
+    def __init__(self, translations):
+        super().__init__(f"translation failed after {len(translations)} texts")
+        self.translations = translations
+
+def translate_merged(translator, chunk):
+    """
+    Translate a chunk of texts in a single request
+
+    Falls back to one request per text when the merged request fails, or when
+    the translation does not hold as many separators as the chunk, e.g. because
+    the engine reformatted them. When a text fails then, PartialTranslationError
+    is raised with the translations of the texts before it.
+    """
+    if len(chunk) > 1:
+        try:
+            translated = translator.translate(MERGE_SEPARATOR.join(chunk))
+        except Exception:
+            translated = None
+        if translated is not None:
+            parts = translated.split(MERGE_SEPARATOR.strip())
+            if len(parts) == len(chunk):
+                return [part.strip() for part in parts]
+    translations = []
+    for text in chunk:
+        try:
+            translations.append(translator.translate(text))
+        except Exception as e:
+            raise PartialTranslationError(translations) from e
+    return translations
+
+def translate_texts(translator, texts, max_workers=DEFAULT_WORKERS):
+    """
+    Translate texts with concurrent requests, of batch prompts of up to BATCH_TEXTS
+    texts with ChatGPT and of merged texts otherwise
+
+    Yields (text, translation) pairs as the requests complete. When a request
+    fails, requests not sent yet are cancelled, the translations received until
+    then (including those of a partly translated chunk) are still yielded, and
+    the error is raised.
+    """
+    if isinstance(translator, ChatGptTranslator):
+        # One prompt per batch instead of per text, small enough for the model to answer in full
+        chunks = [texts[i:i + BATCH_TEXTS] for i in range(0, len(texts), BATCH_TEXTS)]
+        translate_chunk = translator.translate_batch
+    else:
+        chunks = merge_texts(texts)
+        translate_chunk = functools.partial(translate_merged, translator)
+    # Requests wait on the network, so threads overlap them well
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {pool.submit(translate_chunk, chunk): chunk for chunk in chunks}
+    error = None
+    try:
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            chunk = futures[future]
+            try:
+                yield from zip(chunk, future.result())
+            except PartialTranslationError as e:
+                yield from zip(chunk, e.translations)
+                error = error or e.__cause__
+            except Exception as e:
+                error = error or e
+            if error is not None:
+                for pending in futures:
+                    pending.cancel()
+    finally:
+        pool.shutdown(cancel_futures=True)
+    if error is not None:
+        raise error
+
+def get_cached(cache, key: str, cache_ttl: float):
+    """Cached translation of key if younger than cache_ttl days, else None"""
+    if cache_ttl <= 0:
+        return None
+    min_ts = int(time.time() - cache_ttl * 86400)
+    row = cache.execute("SELECT value FROM translations WHERE key = ? AND ts >= ?", (key, min_ts)).fetchone()
+    return row[0] if row is not None else None
+
+def put_cached(cache, key: str, translated: str):
+    """Store a translation in the cache, unless the translator returned nothing"""
+    if translated is not None:
+        cache.execute(
+            "INSERT OR REPLACE INTO translations (key, value, ts) VALUES (?, ?, ?)",
+            (key, translated, int(time.time()))
+        )
+
+def translate_cached(cache, translator, texts, key_of, cache_ttl, max_workers=DEFAULT_WORKERS):
+    """
+    Translate texts, reusing translations from the cache that are younger than cache_ttl days
+
+    key_of(text) gives the cache key of a text. Returns a dict mapping each text to its translation.
+    New translations are committed to the cache as they arrive, so that a failed
+    run can be resumed by running it again.
+    """
+    translations = {}
+    for text in texts:
+        cached = get_cached(cache, key_of(text), cache_ttl)
+        if cached is not None:
+            translations[text] = cached
+
+    missing = [text for text in texts if text not in translations]
+    try:
+        for count, (text, translated) in enumerate(translate_texts(translator, missing, max_workers), 1):
+            translations[text] = translated
+            put_cached(cache, key_of(text), translated)
+            if count % CHECKPOINT_TEXTS == 0:
+                cache.commit()
+    finally:
+        cache.commit()
+    return translations
+
+# Style of the original text when it is moved to its own layer
+ORIG_CSS = "* {font-family: sans-serif;}"
+
+# Font sizes tried in turn when writing plain text into a block
+TEXTBOX_FONTSIZES = (11, 9, 7, 5)
+
+def insert_text(page, bbox, text, css, color=None, oc=0):
+    """
+    Write text into bbox, shrinking it to fit
+
+    Latin-1 text without markup is written with insert_textbox and the built-in
+    Helvetica font, which is several times cheaper than laying out HTML; other
+    text (e.g. CJK, which needs the Story engine's fonts and line breaking) is
+    written with insert_htmlbox and css.
+
+    Returns whether insert_htmlbox was used, which embeds fonts in the document.
+    """
+    if all(ord(c) < 256 for c in text) and '<' not in text and '&' not in text:
+        # insert_textbox breaks words that are too long for the box: leave those to the Story engine
+        longest_word = max(text.split(), key=len, default="")
+        for fontsize in TEXTBOX_FONTSIZES:
+            if pymupdf.get_text_length(longest_word, "helv", fontsize) > bbox[2] - bbox[0]:
+                continue
+            if page.insert_textbox(bbox, text, fontsize=fontsize, fontname="helv", color=color, oc=oc) >= 0:
+                return False
+    page.insert_htmlbox(bbox, text, css=css, oc=oc)
+    return True
+
+def draw_overlays(task):
+    """
+    Draw the translations of a range of pages on blank pages, in a worker process
+
+    task is a (page_sizes, page_blocks, css, color, keep_original) tuple, page_blocks holding
+    (bbox, text, translated) tuples for each page. For every page, the returned PDF
+    holds a page with the translated text (covering the original text when kept),
+    preceded when the original text is hidden by a page with the original text and
+    a page with the covers of the base layer. Also returns whether fonts were embedded.
+    """
+    page_sizes, page_blocks, css, color, keep_original = task
+    pages_per_overlay = 1 if keep_original else 3
+    overlay = pymupdf.open()
+    embedded_fonts = False
+    for (width, height), blocks in zip(page_sizes, page_blocks):
+        # Creating a page invalidates the page objects created before it
+        for _ in range(pages_per_overlay):
+            overlay.new_page(width=width, height=height)
+        *orig_cover, trans_page = [overlay[pno] for pno in range(overlay.page_count - pages_per_overlay, overlay.page_count)]
+        if not keep_original:
+            orig_page, cover_page = orig_cover
+        draw_rect = trans_page.draw_rect if keep_original else cover_page.draw_rect
+        # Cover all blocks first, so that no cover is drawn over the text of another block
+        for bbox, _, _ in blocks:
+            draw_rect(bbox, color=None, fill=WHITE)
+        for bbox, text, translated in blocks:
+            if not keep_original:
+                embedded_fonts |= insert_text(orig_page, bbox, text, ORIG_CSS)
+            embedded_fonts |= insert_text(trans_page, bbox, translated, css, color)
+    return overlay.tobytes(), embedded_fonts
+
+def draw_in_processes(doc, page_blocks, translations, css, color, keep_original, processes, ocg_trans, ocg_orig):
+    """
+    Draw the translated blocks of all pages, splitting the pages into one range per process
+
+    pymupdf is not thread-safe, so the pages are drawn by worker processes on overlay
+    pages (see draw_overlays), which are then shown on the document pages in their layers.
+    Returns whether fonts were embedded.
+    """
+    chunk_size = -(-doc.page_count // processes)  # ceil
+    tasks = [
+        (
+            [(doc[pno].rect.width, doc[pno].rect.height) for pno in range(start, min(start + chunk_size, doc.page_count))],
+            [
+                [(block[:4], block[4], translations[block[4]]) for block in blocks]
+                for blocks in page_blocks[start:start + chunk_size]
+            ],
+            css,
+            color,
+            keep_original,
+        )
+        for start in range(0, doc.page_count, chunk_size)
+    ]
+    with multiprocessing.Pool(processes) as pool:
+        overlays = pool.map(draw_overlays, tasks)
+
+    pages_per_overlay = 1 if keep_original else 3
+    for start, (data, _) in zip(range(0, doc.page_count, chunk_size), overlays):
+        overlay = pymupdf.open("pdf", data)
+        for i in range(overlay.page_count // pages_per_overlay):
+            if not page_blocks[start + i]:
+                continue  # nothing to show on an empty overlay
+            page = doc[start + i]
+            first = i * pages_per_overlay
+            if not keep_original:
+                # The covers go first, the original text is shown above them
+                page.show_pdf_page(page.rect, overlay, first + 1)
+                page.show_pdf_page(page.rect, overlay, first, oc=ocg_orig)
+            page.show_pdf_page(page.rect, overlay, first + pages_per_overlay - 1, oc=ocg_trans)
+        overlay.close()
+    return any(embedded_fonts for _, embedded_fonts in overlays)
+
+def draw_page(page, blocks, translations, trans_css, color, ocg_trans, ocg_orig=None):
+    """
+    Draw the translations of a page's blocks in the translation layer
+
+    The original text is covered in the translation layer, or moved to the
+    ocg_orig layer when given. Returns whether fonts were embedded.
+    """
+    embedded_fonts = False
+    draw_rect = page.draw_rect  # bound once for all blocks
+
+    # Cover all blocks first, so that no cover is drawn over the text of another block.
+    # Every block of text is contained in a rectangle ("bbox")
+    for block in blocks:
+        if ocg_orig is not None:
+            # Clear original text area in base layer
+            draw_rect(block[:4], color=None, fill=WHITE)
+        else:
+            # Cover the original text only in translation layer
+            draw_rect(block[:4], color=None, fill=WHITE, oc=ocg_trans)
+
+    for block in blocks:
+        bbox = block[:4]  # area containing the text
+        text = block[4]  # the text of this block
+
+        if ocg_orig is not None:
+            # Move original text to hidden layer, above the covers
+            embedded_fonts |= insert_text(
+                page,
+                bbox,
+                text,
+                ORIG_CSS,
+                oc=ocg_orig
+            )
+
+        # Write the translated text in specified color
+        embedded_fonts |= insert_text(
+            page,
+            bbox,
+            translations[text],
+            trans_css,
+            color,
+            oc=ocg_trans
+        )
+    return embedded_fonts
+
+def draw_streaming(doc, textflags, translator, cache, key_of, cache_ttl, max_workers, draw):
+    """
+    Extract, translate and draw the pages as a pipeline
+
+    The new texts of a page are merged (see translate_merged) and sent to the
+    translation thread pool as soon as the page is extracted, and earlier pages
+    are drawn as soon as all their translations are back, so that network waits
+    overlap with extraction and drawing. All pymupdf calls stay on this thread.
+    draw(page, blocks, translations) draws a page and returns whether fonts were
+    embedded, which is returned for the whole document.
+
+    New translations are committed to the cache as they arrive, also when the
+    run fails, so that it can be resumed by running it again.
+    """
+    futures = {}  # text -> (future of the translations of its chunk, index in the chunk)
+    unsaved = {}  # new texts whose translations are not in the cache yet, in order
+    pending = deque()  # (page number, blocks) waiting for translations
+    embedded_fonts = False
+
+    def result(text):
+        future, index = futures[text]
+        try:
+            return future.result()[index]
+        except PartialTranslationError as e:
+            raise e.__cause__
+
+    def save_translations():
+        for text in list(unsaved):
+            future, index = futures[text]
+            if not future.done() or future.cancelled():
+                continue
+            error = future.exception()
+            if error is None:
+                translations = future.result()
+            elif isinstance(error, PartialTranslationError):
+                translations = error.translations  # the texts translated before the failure
+            else:
+                continue
+            if index < len(translations):
+                put_cached(cache, key_of(text), translations[index])
+                del unsaved[text]
+        cache.commit()
+
+    def draw_ready(wait):
+        nonlocal embedded_fonts
+        while pending:
+            pno, blocks = pending[0]
+            if not wait and not all(futures[block[4]][0].done() for block in blocks):
+                break
+            pending.popleft()
+            translations = {block[4]: result(block[4]) for block in blocks}
+            embedded_fonts |= draw(doc[pno], blocks, translations)
+            if len(unsaved) >= CHECKPOINT_TEXTS:
+                save_translations()
+
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for page in doc:
+            blocks = get_blocks(page, textflags)
+            page_texts = []
+            for block in blocks:
+                text = block[4]
+                if text in futures:
+                    continue
+                cached = get_cached(cache, key_of(text), cache_ttl)
+                if cached is None:
+                    futures[text] = None  # submitted with the page's other new texts below
+                    page_texts.append(text)
+                else:
+                    future = Future()
+                    future.set_result([cached])
+                    futures[text] = (future, 0)
+            for chunk in merge_texts(page_texts):
+                future = pool.submit(translate_merged, translator, chunk)
+                for index, text in enumerate(chunk):
+                    futures[text] = (future, index)
+            unsaved.update(dict.fromkeys(page_texts))
+            pending.append((page.number, blocks))
+            draw_ready(wait=False)
+        draw_ready(wait=True)
+    finally:
+        # Requests not sent yet are cancelled when a request fails
+        pool.shutdown(cancel_futures=True)
+        save_translations()
+    return embedded_fonts
+
 def translate_pdf(input_file: str, source_lang: str, target_lang: str, layer: str = "Text", 
-                 translator_name: str = "google", text_color: str = "darkred", keep_original: bool = True):
+                 translator_name: str = "google", text_color: str = "darkred", keep_original: bool = True,
+                 cache_ttl: float = DEFAULT_CACHE_TTL, max_workers: int = DEFAULT_WORKERS,
+                 processes: int = None, strategy: str = "auto", subset_fonts: bool = True,
+                 fast_save: bool = False):
     """
     Translate a PDF file from source language to target language
     
@@ -24,21 +462,16 @@ def translate_pdf(input_file: str, source_lang: str, target_lang: str, layer: st
         translator_name: Name of the translator to use (default: "google")
         text_color: Color of translated text (default: "darkred")
         keep_original: Whether to keep original text visible (default: True)
+        cache_ttl: Days cached translations are reused for, 0 to ignore the cache (default: 30)
+        max_workers: Number of concurrent translation requests (default: 8)
+        processes: Number of processes drawing the pages (default: one less than the CPU count)
+        strategy: How to draw the pages, one of STRATEGIES (default: "auto", by page count)
+        subset_fonts: Whether to subset the embedded fonts (default: True)
+        fast_save: Whether to save without compression, faster but larger (default: False)
     """
-    # Define colors
-    WHITE = pymupdf.pdfcolor["white"]
-    
-    # Color mapping
-    COLOR_MAP = {
-        "darkred": (0.8, 0, 0),
-        "black": (0, 0, 0),
-        "blue": (0, 0, 0.8),
-        "darkgreen": (0, 0.5, 0),
-        "purple": (0.5, 0, 0.5),
-    }
-    
-    # Get RGB color values, default to darkred if color not found
+    # Get RGB color values and style, default to darkred if color not found
     rgb_color = COLOR_MAP.get(text_color.lower(), COLOR_MAP["darkred"])
+    trans_css = CSS_COLOR_MAP.get(text_color.lower(), CSS_COLOR_MAP["darkred"])
 
     # This flag ensures that text will be dehyphenated after extraction.
     textflags = pymupdf.TEXT_DEHYPHENATE
@@ -49,8 +482,11 @@ def translate_pdf(input_file: str, source_lang: str, target_lang: str, layer: st
     
     TranslatorClass = TRANSLATORS[translator_name]
     
-    # Configure the translator
-    translator = TranslatorClass(source=source_lang, target=target_lang)
+    # Configure the translator, keeping a connection open for every concurrent request
+    if translator_name == 'google':
+        translator = TranslatorClass(source=source_lang, target=target_lang, pool_size=max_workers)
+    else:
+        translator = TranslatorClass(source=source_lang, target=target_lang)
 
     # Generate output filename
     output_file = input_file.rsplit('.', 1)[0] + f'-{target_lang}.pdf'
@@ -65,45 +501,57 @@ def translate_pdf(input_file: str, source_lang: str, target_lang: str, layer: st
     if not keep_original:
         ocg_orig = doc.add_ocg("Original", on=False)
 
-    # Iterate over all pages
-    for page in doc:
-        # Extract text grouped like lines in a paragraph.
-        blocks = page.get_text("blocks", flags=textflags)
+    cache = open_cache()
+    key_of = functools.partial(cache_key, source_lang, target_lang, translator_name)
 
-        # Every block of text is contained in a rectangle ("bbox")
-        for block in blocks:
-            bbox = block[:4]  # area containing the text
-            text = block[4]  # the text of this block
+    if processes is None:
+        processes = max(1, (os.cpu_count() or 1) - 1)
+    if strategy == 'auto':
+        strategy = choose_strategy(doc.page_count, processes, isinstance(translator, ChatGptTranslator))
 
-            # Invoke the actual translation
-            translated = translator.translate(text)
+    draw = functools.partial(
+        draw_page,
+        trans_css=trans_css,
+        color=rgb_color,
+        ocg_trans=ocg_trans,
+        ocg_orig=None if keep_original else ocg_orig
+    )
 
-            if not keep_original:
-                # Move original text to hidden layer
-                page.insert_htmlbox(
-                    bbox,
-                    text,
-                    css="* {font-family: sans-serif;}",
-                    oc=ocg_orig
-                )
-                # Clear original text area in base layer
-                page.draw_rect(bbox, color=None, fill=WHITE)
-            else:
-                # Cover the original text only in translation layer
-                page.draw_rect(bbox, color=None, fill=WHITE, oc=ocg_trans)
+    if strategy == 'stream':
+        embedded_fonts = draw_streaming(doc, textflags, translator, cache, key_of, cache_ttl, max_workers, draw)
+    else:
+        # Extract text grouped like lines in a paragraph, for all pages first
+        page_blocks = [get_blocks(page, textflags) for page in doc]
 
-            # Write the translated text in specified color
-            page.insert_htmlbox(
-                bbox,
-                translated,
-                css=f"* {{font-family: sans-serif; color: rgb({int(rgb_color[0]*255)}, {int(rgb_color[1]*255)}, {int(rgb_color[2]*255)});}}",
-                oc=ocg_trans
-            )
+        # Translate every distinct text once: repeated headers, footers and
+        # captions, and texts translated by earlier runs, are looked up instead
+        unique_texts = list(dict.fromkeys(block[4] for blocks in page_blocks for block in blocks))
+        translations = translate_cached(cache, translator, unique_texts, key_of, cache_ttl, max_workers)
 
-    doc.subset_fonts()
-    doc.ez_save(output_file)
+        if strategy == 'processes':
+            embedded_fonts = draw_in_processes(doc, page_blocks, translations, trans_css, rgb_color, keep_original,
+                                               processes, ocg_trans, ocg_orig if not keep_original else 0)
+        else:
+            # Iterate over all pages
+            embedded_fonts = False
+            for page, blocks in zip(doc, page_blocks):
+                embedded_fonts |= draw(page, blocks, translations)
+
+    # Only insert_htmlbox embeds fonts, the built-in Helvetica of insert_textbox is not embedded
+    if subset_fonts and embedded_fonts:
+        doc.subset_fonts()
+    doc.save(output_file, **(FAST_SAVE_OPTIONS if fast_save else CLI_SAVE_OPTIONS))
+    cache.commit()
+    cache.close()
     print(f"Translated PDF saved as: {output_file}")
 
+def positive_int(value: str) -> int:
+    """argparse type of counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
 def main():
     """
     can be invoked like this:
@@ -124,6 +572,15 @@ def main():
 
     # do not keep original text as an optional layer:
     python translator_cli.py --source english --translator chatgpt --target zh-CN --no-original input.pdf
+
+    # a failed or interrupted run resumes where it stopped when run again,
+    # because translations are cached as they arrive
+
+    # translate again, ignoring translations cached by earlier runs:
+    python translator_cli.py --source english --target zh-CN --cache-ttl 0 input.pdf
+
+    # try options quickly, saving a larger file without compression:
+    python translator_cli.py --source english --target zh-CN --no-subset-fonts --fast-save input.pdf
     
     ```
 
@@ -143,16 +600,30 @@ def main():
                        choices=list(TRANSLATORS.keys()),
                        help='Translator to use (default: google)')
     parser.add_argument('--color', '-c', default='darkred',
-                       choices=['darkred', 'black', 'blue', 'darkgreen', 'purple'],
+                       choices=list(COLOR_MAP.keys()),
                        help='Color of translated text (default: darkred)')
     parser.add_argument('--no-original', action='store_true',
                        help='Do not keep original text in base layer (default: False)')
+    parser.add_argument('--workers', '-w', type=positive_int, default=DEFAULT_WORKERS,
+                       help=f'Number of concurrent translation requests (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--strategy', default='auto', choices=STRATEGIES,
+                       help='Draw pages after translating the document (batch), while translating (stream) or in '
+                            f'worker processes; auto picks by page count and translator (default: auto)')
+    parser.add_argument('--processes', '-p', type=positive_int, default=None,
+                       help='Number of processes for the processes strategy (default: CPU count - 1)')
+    parser.add_argument('--no-subset-fonts', action='store_true',
+                       help='Do not subset the fonts embedded for the translation, saving faster (default: False)')
+    parser.add_argument('--fast-save', action='store_true',
+                       help='Save without compression, faster but larger, e.g. while trying options (default: False)')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_CACHE_TTL,
+                       help=f'Days to reuse cached translations for, 0 to ignore the cache (default: {DEFAULT_CACHE_TTL})')
 
     args = parser.parse_args()
 
     try:
         translate_pdf(args.input_file, args.source, args.target, args.layer, 
-                     args.translator, args.color, not args.no_original)
+                     args.translator, args.color, not args.no_original, args.cache_ttl, args.workers, args.processes, args.strategy,
+                     not args.no_subset_fonts, args.fast_save)
     except Exception as e:
         print(f"Error: {str(e)}")
         exit(1)